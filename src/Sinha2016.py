@@ -27,15 +27,51 @@ sys.argv.append('--quiet')
 import nest
 import numpy
 import math
-import random
 
 
 class Sinha2016:
 
     """Simulations for my PhD 2016."""
 
-    def __init__(self):
-        """Initialise variables."""
+    # Connection parameters that do not depend on the instance. These are
+    # shared by all instances, so don't modify them in place.
+    # Global sparsity
+    sparsity = 0.02
+    sparsityStim = 0.05
+
+    # From the butz paper
+    connectionNumberExtE = 1
+    connectionNumberExtI = 1
+
+    # connection dictionaries
+    connDictExtE = {'rule': 'fixed_indegree',
+                    'indegree': connectionNumberExtE}
+    connDictExtI = {'rule': 'fixed_indegree',
+                    'indegree': connectionNumberExtI}
+    # Let Nest pick the sparse connections itself instead of connecting
+    # all to all and then zeroing 98% of the weights. This also works
+    # with MPI etc, where each thread has different numbers of
+    # connections that I cannot ascertain before hand.
+    # Only the connections that exist are created now, so store_pattern
+    # has to create the missing pattern to pattern ones itself.
+    connDictSparse = {'rule': 'pairwise_bernoulli',
+                      'p': sparsity}
+
+    synDictIE = {'model': 'vogels_sprekeler_synapse',
+                 'weight': -0.0000001, 'Wmax': -30000.,
+                 'alpha': .32, 'eta': 0.001,
+                 'tau': 20., 'pre_synaptic_element': 'Axon_in',
+                 'post_synaptic_element': 'Den_in'}
+
+    def __init__(self, sp_update_interval=100):
+        """
+        Initialise variables.
+
+        sp_update_interval is how often, in ms, Nest updates structural
+        plasticity. Each update is a pass over all neurons, so a longer
+        interval (say 1000 ms) runs faster, but check the calcium dynamics
+        against the default before relying on it.
+        """
         # default resolution in nest is 0.1ms. Using the same value
         # http://www.nest-simulator.org/scheduling-and-simulation-flow/
         self.dt = 0.1
@@ -48,7 +84,7 @@ class Sinha2016:
 
         # structural plasticity bits
         # must be an integer
-        self.sp_update_interval = 100  # ms
+        self.sp_update_interval = int(sp_update_interval)  # ms
         # time recall stimulus is enabled for
         self.recall_time = 1000.  # ms
         # Number of patterns we store
@@ -76,7 +112,8 @@ class Sinha2016:
         self.weightExtE = 5.
         self.weightExtI = 5.
 
-        random.seed(42)
+        # used to pick pattern, recall and deaff neurons
+        self.rng = numpy.random.default_rng(42)
 
     def __setup_neurons(self):
         """Setup neuron sets."""
@@ -147,95 +184,33 @@ class Sinha2016:
                                        self.populations['Poisson'],
                                        params=self.poissonExtDict)
 
-    def __create_sparse_list(self, length, static_w, sparsity):
-        """Create one list to use with SetStatus."""
-        weights = []
-        valid_values = int(length * sparsity)
-        weights = (
-            ([float(static_w), ] * valid_values) +
-            ([0., ] * int(length - valid_values)))
-
-        random.shuffle(weights)
-        return weights
-
-    def __fill_matrix(self, weightlist, static_w, sparsity):
-        """Create a weight matrix to use in syn dict."""
-        weights = []
-        for row in weightlist:
-            if isinstance(row, (list, tuple)):
-                rowlen = len(row)
-                valid_values = int(rowlen * sparsity)
-                arow = (
-                    ([float(static_w), ] * valid_values) +
-                    ([0., ] * int(rowlen - valid_values))
-                )
-                random.shuffle(arow)
-                weights.append(arow)
-        return weights
-
-    def __setup_matrix(self, pre_dim, post_dim, static_w, sparsity):
-        """Create a weight matrix to use in syn dict."""
-        weights = []
-        valid_values = int(post_dim * sparsity)
-        for i in range(0, pre_dim):
-            arow = (
-                ([float(static_w), ] * valid_values) +
-                ([0., ] * int(post_dim - valid_values))
-            )
-            random.shuffle(arow)
-            weights.append(arow)
-
-        return weights
-
     def __setup_connections(self):
         """Setup connections."""
-        # Global sparsity
-        self.sparsity = 0.02
-        self.sparsityStim = 0.05
-
         # Other connection numbers
         self.connectionNumberStim = int((self.populations['STIM'] *
                                          self.populations['R'])
                                         * self.sparsityStim)
-        # From the butz paper
-        self.connectionNumberExtE = 1
-        self.connectionNumberExtI = 1
 
         # connection dictionaries
-        self.connDictExtE = {'rule': 'fixed_indegree',
-                             'indegree': self.connectionNumberExtE}
-        self.connDictExtI = {'rule': 'fixed_indegree',
-                             'indegree': self.connectionNumberExtI}
         self.connDictStim = {'rule': 'fixed_total_number',
                              'N': self.connectionNumberStim}
 
         # Documentation says things are normalised in the iaf neuron so that
         # weight of 1 translates to 1nS
-        # Leave them at 0 to begin with and let Nest for the connections
-        # Then, I'll get these and set them individually later
-        # I've got to do this because while using MPI etc, each thread has
-        # different numbers of connections and I cannot ascertain these numbers
-        # before hand.
         self.synDictEE = {'model': 'static_synapse',
-                          'weight': 0.,
+                          'weight': self.weightEE,
                           'pre_synaptic_element': 'Axon_ex',
                           'post_synaptic_element': 'Den_ex'}
         self.synDictEI = {'model': 'static_synapse',
-                          'weight': 0.,
+                          'weight': self.weightEI,
                           'pre_synaptic_element': 'Axon_ex',
                           'post_synaptic_element': 'Den_ex'}
 
         self.synDictII = {'model': 'static_synapse',
-                          'weight': 0.,
+                          'weight': self.weightII,
                           'pre_synaptic_element': 'Axon_in',
                           'post_synaptic_element': 'Den_in'}
 
-        self.synDictIE = {'model': 'vogels_sprekeler_synapse',
-                          'weight': -0.0000001, 'Wmax': -30000.,
-                          'alpha': .32, 'eta': 0.001,
-                          'tau': 20., 'pre_synaptic_element': 'Axon_in',
-                          'post_synaptic_element': 'Den_in'}
-
     def __connect_neurons(self):
         """Connect the neuron sets up."""
         nest.Connect(self.poissonExtE, self.neuronsE,
@@ -247,40 +222,22 @@ class Sinha2016:
                      syn_spec={'model': 'static_synapse',
                                'weight': self.weightExtI})
 
-        # all to all
         nest.Connect(self.neuronsE, self.neuronsE,
+                     conn_spec=self.connDictSparse,
                      syn_spec=self.synDictEE)
-        conns = nest.GetConnections(source=self.neuronsE, target=self.neuronsE)
-        weights = self.__create_sparse_list(
-            len(conns), self.weightEE, self.sparsity)
-        i = 0
-        for conn in conns:
-            nest.SetStatus([conn], {'weight': weights[i]})
-            i = i+1
         print("EE weights set up.")
 
         nest.Connect(self.neuronsE, self.neuronsI,
+                     conn_spec=self.connDictSparse,
                      syn_spec=self.synDictEI)
-        conns = nest.GetConnections(source=self.neuronsE, target=self.neuronsI)
-        weights = self.__create_sparse_list(
-            len(conns), self.weightEI, self.sparsity)
-        i = 0
-        for conn in conns:
-            nest.SetStatus([conn], {'weight': weights[i]})
-            i = i+1
         print("EI weights set up.")
 
         nest.Connect(self.neuronsI, self.neuronsI,
+                     conn_spec=self.connDictSparse,
                      syn_spec=self.synDictII)
-        conns = nest.GetConnections(source=self.neuronsI, target=self.neuronsI)
-        weights = self.__create_sparse_list(
-            len(conns), self.weightII, self.sparsity)
-        i = 0
-        for conn in conns:
-            nest.SetStatus([conn], {'weight': weights[i]})
-            i = i+1
         print("II weights set up.")
 
+        # all to all
         nest.Connect(self.neuronsI, self.neuronsE,
                      syn_spec=self.synDictIE)
         # conns = nest.GetConnections(source=self.neuronsI,
@@ -325,18 +282,24 @@ class Sinha2016:
         self.mean_synaptic_weights_file_name = (
             "00-synaptic-weights-" + str(self.rank) + ".txt")
 
+        # line buffered, so each line reaches the file as soon as it's
+        # written, like the explicit flush after every line used to do
         self.mean_synaptic_weights_file = open(
-            self.mean_synaptic_weights_file_name, 'w')
+            self.mean_synaptic_weights_file_name, 'w', buffering=1)
+        self.mean_synaptic_weights_fmt = "\t".join(["%s"] * 4) + "\n"
 
         self.ca_filename = ("calcium-" +
                             str(self.rank) + ".txt")
         self.ca_file_handle = open(self.ca_filename, 'w')
+        self.ca_fmt = "\t".join(["%s"] * 2) + "\n"
 
         self.syn_elms_filename = ("00-synaptic-elements-" +
                                   str(self.rank) + ".txt")
         self.syn_elms_file_handle = open(self.syn_elms_filename, 'w')
-        print(
-            "{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}".format
+        # written every recording interval, so only build it once
+        self.syn_elms_fmt = "\t".join(["%s"] * 12) + "\n"
+        self.syn_elms_file_handle.write(
+            self.syn_elms_fmt %
             (
                 "a_ex_total", "a_ex_connected",
                 "d_ex_ex_total", "d_ex_ex_connected",
@@ -344,8 +307,7 @@ class Sinha2016:
                 "a_in_total", "a_in_connected",
                 "d_in_ex_total", "d_in_ex_connected",
                 "d_in_in_total", "d_in_in_connected"
-            ),
-            file=self.syn_elms_file_handle)
+            ))
 
     def setup_simulation(self):
         """Set up simulation."""
@@ -384,25 +346,27 @@ class Sinha2016:
         current_simtime = (
             str(nest.GetKernelStatus()['time'] * 1000) + "msec")
 
-        self.dump_ca_concentration()
-        self.dump_synaptic_elements()
+        local_stats = self.__collect_local_stats()
+        self.dump_ca_concentration(local_stats)
+        self.dump_synaptic_elements(local_stats)
         self.dump_mean_synaptic_weights()
         self.dump_all_IE_weights("initial_setup-")
         self.dump_all_EE_weights("initial_setup-")
 
     def stabilise(self, step=False, annotation=""):
         """Stabilise network."""
-        sim_steps = numpy.arange(0, self.stabilisation_time,
-                                 self.sp_recording_interval)
-        for i, j in enumerate(sim_steps):
+        # __init__ makes sure this divides exactly
+        sim_steps = int(self.stabilisation_time // self.sp_recording_interval)
+        for i in range(sim_steps):
             self.run_simulation(self.sp_recording_interval, step, annotation)
 
     def run_simulation(self, simtime=2000, step=False, annotation=""):
         """Run the simulation."""
-        sim_steps = numpy.arange(0, simtime)
         if step:
             print("Stepping through the simulation one second at a time")
-            for i, step in enumerate(sim_steps):
+            # one step per started second, like arange(0, simtime) did
+            sim_steps = int(math.ceil(simtime))
+            for i in range(sim_steps):
 
                 nest.Simulate(1000)
                 self.dump_mean_synaptic_weights()
@@ -411,14 +375,49 @@ class Sinha2016:
             nest.Simulate(simtime*1000)
             current_simtime = (
                 str(nest.GetKernelStatus()['time'] * 1000) + "msec")
-            self.dump_ca_concentration()
-            self.dump_synaptic_elements()
+            local_stats = self.__collect_local_stats()
+            self.dump_ca_concentration(local_stats)
+            self.dump_synaptic_elements(local_stats)
             self.dump_mean_synaptic_weights()
             self.dump_all_IE_weights(annotation)
             self.dump_all_EE_weights(annotation)
 
             print("Simulation time: " "{}".format(current_simtime))
 
+    def __write_neuron_list(self, file_name, neurons):
+        """Write a list of neurons to a file, one per line."""
+        file_handle = open(file_name, 'w')
+        # one write for the lot instead of a print per neuron
+        file_handle.write("".join("{}\n".format(neuron)
+                                  for neuron in neurons))
+        file_handle.close()
+
+    def __connect_missing_pattern_pairs(self, pattern_neurons, connections,
+                                        weight):
+        """
+        Connect the pattern pairs that are not already connected.
+
+        connections are the existing pattern to pattern connections. These
+        are only the ones local to this process, but so are the targets that
+        nest creates connections for here, so each process fills in exactly
+        the pairs it owns.
+        """
+        pattern = numpy.asarray(pattern_neurons, dtype=numpy.int64)
+        stride = int(pattern.max()) + 1
+        sources, targets = numpy.meshgrid(pattern, pattern, indexing='ij')
+        sources = sources.ravel()
+        targets = targets.ravel()
+
+        existing = numpy.asarray([conn[0] * stride + conn[1]
+                                  for conn in connections], dtype=numpy.int64)
+        missing = ~numpy.isin(sources * stride + targets, existing)
+
+        syn_dict = dict(self.synDictEE, weight=weight)
+        nest.Connect(sources[missing].tolist(), targets[missing].tolist(),
+                     conn_spec='one_to_one', syn_spec=syn_dict)
+        print("ANKUR>> Number of connections added: "
+              "{}".format(int(missing.sum())))
+
     def store_pattern(self):
         """ Store a pattern and set up spike detectors."""
         spike_detector_paramsP = {
@@ -432,13 +431,13 @@ class Sinha2016:
                       str(self.pattern_count))
         }
 
-        local_neurons = nest.GetNodes(
+        local_neurons = numpy.asarray(nest.GetNodes(
             nest.CurrentSubnet(), {'model': 'tif_neuronE'},
-            local_only=False)[0]
+            local_only=False)[0])
 
-        pattern_neurons = random.sample(
+        pattern_neurons = self.rng.choice(
             local_neurons,
-            self.populations['P'])
+            self.populations['P'], replace=False).tolist()
         print("ANKUR>> Number of pattern neurons: "
               "{}".format(len(pattern_neurons)))
 
@@ -449,25 +448,27 @@ class Sinha2016:
               "{}".format(len(connections)))
         nest.SetStatus(connections, {"weight": 24.})
 
-        # store these neurons
-        self.patterns.append(pattern_neurons)
+        # EE is sparse, so only ~2% of the pattern pairs are connected.
+        # Create the rest so that the pattern is connected all to all, as it
+        # was when EE was set up all to all.
+        self.__connect_missing_pattern_pairs(pattern_neurons, connections,
+                                             24.)
+
+        # store these neurons as an int32 array, the recall and deaff
+        # subsets are drawn from it
+        self.patterns.append(numpy.asarray(pattern_neurons, dtype=numpy.int32))
         # print to file
         file_name = "patternneurons-{}-rank-{}.txt".format(self.pattern_count,
                                                            self.rank)
-        file_handle = open(file_name, 'w')
-        for neuron in pattern_neurons:
-            print(neuron, file=file_handle)
-        file_handle.close()
+        self.__write_neuron_list(file_name, pattern_neurons)
 
         # background neurons
-        background_neurons = list(set(local_neurons) - set(pattern_neurons))
+        background_neurons = local_neurons[
+            ~numpy.isin(local_neurons, self.patterns[-1])].tolist()
         file_name = "backgroundneurons-{}-rank-{}.txt".format(
             self.pattern_count, self.rank)
 
-        file_handle = open(file_name, 'w')
-        for neuron in background_neurons:
-            print(neuron, file=file_handle)
-        file_handle.close()
+        self.__write_neuron_list(file_name, background_neurons)
 
         # set up spike detectors
         # pattern
@@ -520,9 +521,9 @@ class Sinha2016:
         self.neuronsStim.append(stim_neurons)
 
         pattern_neurons = self.patterns[pattern_number - 1]
-        recall_neurons = random.sample(
+        recall_neurons = self.rng.choice(
             pattern_neurons,
-            self.populations['R'])
+            self.populations['R'], replace=False).tolist()
         print("ANKUR>> Number of recall neurons: "
               "{}".format(len(recall_neurons)))
 
@@ -534,10 +535,7 @@ class Sinha2016:
         # print to file
         file_name = "recallneurons-{}-rank-{}.txt".format(self.pattern_count,
                                                           self.rank)
-        file_handle = open(file_name, 'w')
-        for neuron in recall_neurons:
-            print(neuron, file=file_handle)
-        file_handle.close()
+        self.__write_neuron_list(file_name, recall_neurons)
 
         spike_detector_paramsR = {
             'to_file': True,
@@ -575,9 +573,9 @@ class Sinha2016:
     def deaff_pattern(self, pattern_number):
         """Deaff the network."""
         pattern_neurons = self.patterns[pattern_number - 1]
-        deaffed_neurons = random.sample(
+        deaffed_neurons = self.rng.choice(
             pattern_neurons,
-            self.populations['D'])
+            self.populations['D'], replace=False).tolist()
         print("ANKUR>> Number of deaff neurons: "
               "{}".format(len(deaffed_neurons)))
         nest.SetStatus(deaffed_neurons, {'I_e': 0.})
@@ -588,84 +586,132 @@ class Sinha2016:
         # save the detector
         self.sdL.append(deaff_spike_detector)
 
+    def __save_weights(self, file_name, weights, dtype=numpy.float16):
+        """
+        Save weights to a compressed archive.
+
+        The weights are only kept for analysis. With the default float16
+        they are divided by a scale that maps the largest magnitude to just
+        under the float16 maximum. Weights within about 9 decades of the
+        largest keep float16's ~3 significant digits. Smaller ones fall into
+        the subnormals and lose precision, and anything more than about 12
+        decades below the largest is flushed to zero. Use float32 for
+        weights with a wider range; they are stored as is with a scale of 1.
+        Load them back with:
+        data = numpy.load(file_name); data['w'] * data['scale']
+        """
+        weights = numpy.asarray(weights, dtype=numpy.float32)
+        if dtype == numpy.float16:
+            # floor so that an all zero dump doesn't divide by zero
+            scale = numpy.float32(
+                max(numpy.abs(weights).max(initial=0.) / 6e4,
+                    numpy.finfo(numpy.float32).tiny))
+        else:
+            scale = numpy.float32(1.)
+        numpy.savez_compressed(file_name,
+                               w=(weights / scale).astype(dtype),
+                               scale=scale)
+
     def dump_all_IE_weights(self, annotation):
         """Dump all IE weights to a file."""
-        file_name = ("synaptic-weight-IE-" + annotation +
-                     "-{}-{}".format(
-                         self.rank,
-                         nest.GetKernelStatus()['time']) +
-                     ".txt")
-        file_handle = open(file_name, 'w')
+        current_time = nest.GetKernelStatus()['time']
+        file_name = (f"synaptic-weight-IE-{annotation}-{self.rank}-"
+                     f"{current_time}.npz")
         connections = nest.GetConnections(source=self.neuronsI,
                                           target=self.neuronsE)
-        weights = nest.GetStatus(connections, "weight")
-        print(weights, file=file_handle)
-        file_handle.close()
+        # IE weights span from ~-1e-7 before they are potentiated to
+        # Wmax = -30000, too wide a range for float16
+        self.__save_weights(file_name, nest.GetStatus(connections, "weight"),
+                            numpy.float32)
 
     def dump_all_EE_weights(self, annotation):
         """Dump all EE weights to a file."""
-        file_name = ("synaptic-weight-EE-" + annotation +
-                     "-{}-{}".format(
-                         self.rank,
-                         nest.GetKernelStatus()['time']) +
-                     ".txt")
-        file_handle = open(file_name, 'w')
+        current_time = nest.GetKernelStatus()['time']
+        file_name = (f"synaptic-weight-EE-{annotation}-{self.rank}-"
+                     f"{current_time}.npz")
         connections = nest.GetConnections(source=self.neuronsE,
                                           target=self.neuronsE)
-        weights = nest.GetStatus(connections, "weight")
-        print(weights, file=file_handle)
-        file_handle.close()
+        self.__save_weights(file_name, nest.GetStatus(connections, "weight"))
+
+    def __get_local_status(self, neurons, keys):
+        """Get status of the neurons that are local to this process."""
+        # only ask for the local flag here, fetching the full status
+        # dictionary of every neuron just to filter on it is expensive
+        local = nest.GetStatus(neurons, 'local')
+        loc = [neuron for neuron, is_local in zip(neurons, local) if is_local]
+        return nest.GetStatus(loc, keys)
+
+    def __collect_local_stats(self):
+        """
+        Collect calcium and synaptic elements of local neurons.
 
-    def dump_ca_concentration(self):
-        """Dump calcium concentration."""
-        loc_e = [stat['global_id'] for stat in nest.GetStatus(self.neuronsE)
-                 if stat['local']]
-        loc_i = [stat['global_id'] for stat in nest.GetStatus(self.neuronsI)
-                 if stat['local']]
-        ca_e = numpy.mean(nest.GetStatus(loc_e, 'Ca'))
-        ca_i = numpy.mean(nest.GetStatus(loc_i, 'Ca'))
-        print("{}\t{}".format(ca_e, ca_i), file=self.ca_file_handle)
-
-    def dump_synaptic_elements(self):
-        """Dump number of synaptic elements."""
-        loc_e = [stat['global_id'] for stat in nest.GetStatus(self.neuronsE)
-                 if stat['local']]
-        loc_i = [stat['global_id'] for stat in nest.GetStatus(self.neuronsI)
-                 if stat['local']]
-        syn_elems_e = nest.GetStatus(loc_e, 'synaptic_elements')
-        syn_elems_i = nest.GetStatus(loc_i, 'synaptic_elements')
+        Both dump_ca_concentration and dump_synaptic_elements need these, so
+        fetch them once per recording interval and pass them to both.
+        """
+        keys = ('Ca', 'synaptic_elements')
+        return (self.__get_local_status(self.neuronsE, keys),
+                self.__get_local_status(self.neuronsI, keys))
+
+    def dump_ca_concentration(self, local_stats=None):
+        """
+        Dump calcium concentration.
+
+        local_stats are the stats returned by __collect_local_stats, they're
+        collected afresh if not given.
+        """
+        if local_stats is None:
+            local_stats = self.__collect_local_stats()
+        stats_e, stats_i = local_stats
+        ca_e = numpy.mean([stat[0] for stat in stats_e])
+        ca_i = numpy.mean([stat[0] for stat in stats_i])
+        self.ca_file_handle.write(self.ca_fmt % (ca_e, ca_i))
+
+    def __sum_synaptic_elements(self, syn_elems, element_names):
+        """
+        Sum synaptic element counts over a set of neurons.
+
+        Returns the total and connected count of each element in
+        element_names, in that order.
+        """
+        counts = numpy.empty((len(syn_elems), 2 * len(element_names)))
+        for i, neuron in enumerate(syn_elems):
+            counts[i] = [neuron[name][key] for name in element_names
+                         for key in ('z', 'z_connected')]
+        sums = counts.sum(axis=0).tolist()
+        # connected counts are integers in nest, keep writing them as such
+        sums[1::2] = [int(connected) for connected in sums[1::2]]
+        return sums
+
+    def dump_synaptic_elements(self, local_stats=None):
+        """
+        Dump number of synaptic elements.
+
+        local_stats are the stats returned by __collect_local_stats, they're
+        collected afresh if not given.
+        """
+        if local_stats is None:
+            local_stats = self.__collect_local_stats()
+        stats_e, stats_i = local_stats
+        syn_elems_e = [stat[1] for stat in stats_e]
+        syn_elems_i = [stat[1] for stat in stats_i]
 
         # Only need presynaptic elements to find number of synapses
         # Excitatory neuron set
-        axons_ex_total = sum(neuron['Axon_ex']['z'] for neuron in
-                             syn_elems_e)
-        axons_ex_connected = sum(neuron['Axon_ex']['z_connected'] for neuron in
-                                 syn_elems_e)
-        dendrites_ex_ex_total = sum(neuron['Den_ex']['z'] for neuron in
-                                    syn_elems_e)
-        dendrites_ex_ex_connected = sum(neuron['Den_ex']['z_connected'] for
-                                        neuron in syn_elems_e)
-        dendrites_ex_in_total = sum(neuron['Den_in']['z'] for neuron in
-                                    syn_elems_e)
-        dendrites_ex_in_connected = sum(neuron['Den_in']['z_connected'] for
-                                        neuron in syn_elems_e)
+        (axons_ex_total, axons_ex_connected,
+         dendrites_ex_ex_total, dendrites_ex_ex_connected,
+         dendrites_ex_in_total, dendrites_ex_in_connected) = (
+             self.__sum_synaptic_elements(
+                 syn_elems_e, ('Axon_ex', 'Den_ex', 'Den_in')))
 
         # Inhibitory neuron set
-        axons_in_total = sum(neuron['Axon_in']['z'] for neuron in
-                             syn_elems_i)
-        axons_in_connected = sum(neuron['Axon_in']['z_connected'] for neuron in
-                                 syn_elems_i)
-        dendrites_in_ex_total = sum(neuron['Den_ex']['z'] for neuron in
-                                    syn_elems_i)
-        dendrites_in_ex_connected = sum(neuron['Den_ex']['z_connected'] for
-                                        neuron in syn_elems_i)
-        dendrites_in_in_total = sum(neuron['Den_in']['z'] for neuron in
-                                    syn_elems_i)
-        dendrites_in_in_connected = sum(neuron['Den_in']['z_connected'] for
-                                        neuron in syn_elems_i)
-
-        print(
-            "{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}\t{}".format
+        (axons_in_total, axons_in_connected,
+         dendrites_in_ex_total, dendrites_in_ex_connected,
+         dendrites_in_in_total, dendrites_in_in_connected) = (
+             self.__sum_synaptic_elements(
+                 syn_elems_i, ('Axon_in', 'Den_ex', 'Den_in')))
+
+        self.syn_elms_file_handle.write(
+            self.syn_elms_fmt %
             (
                 axons_ex_total, axons_ex_connected,
                 dendrites_ex_ex_total, dendrites_ex_ex_connected,
@@ -673,38 +719,29 @@ class Sinha2016:
                 axons_in_total, axons_in_connected,
                 dendrites_in_ex_total, dendrites_in_ex_connected,
                 dendrites_in_in_total, dendrites_in_in_connected,
-            ),
-            file=self.syn_elms_file_handle)
+            ))
+
+    def __get_mean_weight(self, source, target):
+        """Get the mean weight of all connections from source to target."""
+        conns = nest.GetConnections(source=source, target=target)
+        weights = numpy.asarray(nest.GetStatus(conns, "weight"),
+                                dtype=numpy.float32)
+        # accumulate in double precision, there are millions of these
+        return weights.mean(dtype=numpy.float64)
 
     def dump_mean_synaptic_weights(self):
         """Dump synaptic weights."""
-        conns = nest.GetConnections(target=self.neuronsE,
-                                    source=self.neuronsI)
-        weightsIE = nest.GetStatus(conns, "weight")
-        mean_weightsIE = numpy.mean(weightsIE)
-
-        conns = nest.GetConnections(target=self.neuronsI,
-                                    source=self.neuronsI)
-        weightsII = nest.GetStatus(conns, "weight")
-        mean_weightsII = numpy.mean(weightsII)
-
-        conns = nest.GetConnections(target=self.neuronsI,
-                                    source=self.neuronsE)
-        weightsEI = nest.GetStatus(conns, "weight")
-        mean_weightsEI = numpy.mean(weightsEI)
-
-        conns = nest.GetConnections(target=self.neuronsE,
-                                    source=self.neuronsE)
-        weightsEE = nest.GetStatus(conns, "weight")
-        mean_weightsEE = numpy.mean(weightsEE)
-
-        statement_w = "{0}\t{1}\t{2}\t{3}\n".format(mean_weightsEE,
-                                                    mean_weightsEI,
-                                                    mean_weightsII,
-                                                    mean_weightsIE)
+        mean_weightsIE = self.__get_mean_weight(self.neuronsI, self.neuronsE)
+        mean_weightsII = self.__get_mean_weight(self.neuronsI, self.neuronsI)
+        mean_weightsEI = self.__get_mean_weight(self.neuronsE, self.neuronsI)
+        mean_weightsEE = self.__get_mean_weight(self.neuronsE, self.neuronsE)
+
+        statement_w = self.mean_synaptic_weights_fmt % (mean_weightsEE,
+                                                        mean_weightsEI,
+                                                        mean_weightsII,
+                                                        mean_weightsIE)
 
         self.mean_synaptic_weights_file.write(statement_w)
-        self.mean_synaptic_weights_file.flush()
 
 if __name__ == "__main__":
     step = False
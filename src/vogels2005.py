@@ -21,35 +21,106 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from __future__ import print_function
-import sys
-sys.argv.append('--quiet')
+from types import MappingProxyType
 import nest
-import numpy
-import math
-import random
 
 
+# seed for all random number generators
+SEED = 42
+# Number of threads per process. The connections and spike trains nest
+# draws depend on the number of virtual processes (threads times MPI
+# processes), so results are only reproducible with the same value here
+# and the same number of MPI processes.
+NUM_THREADS = 4
+
+# population sizes
+NE, NI = 8000, 2000
+# connection probability, and the resulting indegrees from each population
+EPSILON = 0.02
+K_E = int(EPSILON * NE)
+K_I = int(EPSILON * NI)
+# synaptic weights, weight of 1 translates to 1nS in the iaf_cond neurons
+WEIGHT_E = 3.
+WEIGHT_I = -30.
+# weight of the external poisson input, as in Sinha2016
+WEIGHT_EXT = 5.
+
 # see the aif source for symbol definitions
-self.neuronDict = {'V_m': -60.,
-                    't_ref': 5.0, 'V_reset': -60.,
-                    'V_th': -50., 'C_m': 200.,
-                    'E_L': -60., 'g_L': 10.,
-                    'E_ex': 0., 'E_in': -80.,
-                    'tau_syn_ex': 5., 'tau_syn_in': 10.}
+# read only, so that it can't be changed after nest has copied it into the
+# model defaults
+NEURON_PARAMS = MappingProxyType({'V_m': -60.,
+                                  't_ref': 5.0, 'V_reset': -60.,
+                                  'V_th': -50., 'C_m': 200.,
+                                  'E_L': -60., 'g_L': 10.,
+                                  'E_ex': 0., 'E_in': -80.,
+                                  'tau_syn_ex': 5., 'tau_syn_in': 10.})
+
+# external input
+POISSON_PARAMS = {'rate': 10., 'origin': 0., 'start': 0.}
+
+# Nest stuff
+nest.ResetKernel()
+# http://www.nest-simulator.org/sli/setverbosity/
+nest.set_verbosity('M_WARNING')
+# default resolution in nest is 0.1ms. Using the same value.
+# Nest is built with OpenMP, so run NUM_THREADS threads. This has to be set
+# before any nodes are created.
+nest.SetKernelStatus(
+    {
+        'resolution': 0.1,
+        'local_num_threads': NUM_THREADS
+    }
+)
+# Seed the global rng and one rng per virtual process with distinct seeds so
+# that each thread draws from its own reproducible stream. Must come after
+# the number of threads is set.
+n_vp = nest.GetKernelStatus('total_num_virtual_procs')
+nest.SetKernelStatus(
+    {
+        'grng_seed': SEED + n_vp,
+        'rng_seeds': list(range(SEED + n_vp + 1, SEED + 2 * n_vp + 1))
+    }
+)
+
 # Set up TIF neurons
+# Vogels et al. use conductance based synapses, so this has to stay
+# iaf_cond_exp. The precise spiking iaf_psc_*_ps models are current based,
+# and they are still updated every time step, so they would not be cheaper.
 # Setting up two models because then it makes it easier for me to get
 # them when I need to set up patterns
-nest.CopyModel("iaf_cond_exp", "tif_neuronE")
-nest.SetDefaults("tif_neuronE", self.neuronDict)
-nest.CopyModel("iaf_cond_exp", "tif_neuronI")
-nest.SetDefaults("tif_neuronI", self.neuronDict)
-
-self.neuronsE = nest.Create('tif_neuronE', 8000)
-self.neuronsI = nest.Create('tif_neuronI', 2000)
-self.poissonExtE = nest.Create('poisson_generator',
-                                self.populations['Poisson'],
-                                params=self.poissonExtDict)
-self.poissonExtI = nest.Create('poisson_generator',
-                                self.populations['Poisson'],
-                                params=self.poissonExtDict)
+# PyNEST only takes real dicts, hence the copies
+nest.CopyModel("iaf_cond_exp", "tif_neuronE", dict(NEURON_PARAMS))
+nest.CopyModel("iaf_cond_exp", "tif_neuronI", dict(NEURON_PARAMS))
+
+# The model only has one excitatory and one inhibitory weight, so store them
+# once in the synapse model instead of once per synapse. Use
+# syn_spec="excSyn"/"inhSyn" when connecting.
+nest.CopyModel("static_synapse_hom_w", "excSyn", {"weight": WEIGHT_E})
+nest.CopyModel("static_synapse_hom_w", "inhSyn", {"weight": WEIGHT_I})
+
+neuronsE = nest.Create('tif_neuronE', NE)
+neuronsI = nest.Create('tif_neuronI', NI)
+# All neurons, so that the sparse recurrent connections can be made with one
+# Connect per source population
+neurons = neuronsE + neuronsI
+# A single poisson_generator sends an independent spike train to each of
+# its targets, so one per population is enough.
+poissonExtE = nest.Create('poisson_generator', 1,
+                          params=POISSON_PARAMS)
+poissonExtI = nest.Create('poisson_generator', 1,
+                          params=POISSON_PARAMS)
+
+# external input
+nest.Connect(poissonExtE, neuronsE, conn_spec='all_to_all',
+             syn_spec={'model': 'static_synapse', 'weight': WEIGHT_EXT})
+nest.Connect(poissonExtI, neuronsI, conn_spec='all_to_all',
+             syn_spec={'model': 'static_synapse', 'weight': WEIGHT_EXT})
+
+# Sparse recurrent connections: every neuron gets K_E excitatory and K_I
+# inhibitory inputs. Nest draws these in C++ on all threads.
+nest.Connect(neuronsE, neurons,
+             conn_spec={'rule': 'fixed_indegree', 'indegree': K_E},
+             syn_spec="excSyn")
+nest.Connect(neuronsI, neurons,
+             conn_spec={'rule': 'fixed_indegree', 'indegree': K_I},
+             syn_spec="inhSyn")